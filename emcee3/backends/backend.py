@@ -13,6 +13,13 @@ class Backend(object):
 
     The backend can be subscripted to access the data.
 
+    Args:
+        float_dtype (Optional): If provided, all floating point fields of the
+            chain will be stored using this data type (e.g.
+            ``numpy.float32``) to reduce the memory footprint of the chain.
+            This only affects the stored values; all the computations are
+            still performed at the native precision of the walkers.
+
     Attributes:
         acceptance: An array of ``nwalkers`` integer acceptance counts.
         acceptance_fraction: An array of ``nwalkers`` acceptance fractions.
@@ -25,7 +32,8 @@ class Backend(object):
 
     """
 
-    def __init__(self):
+    def __init__(self, float_dtype=None):
+        self.float_dtype = float_dtype
         self._data = None
         self.reset()
 
@@ -42,6 +50,15 @@ class Backend(object):
         self._data = None
         self._random_state = None
 
+    def release(self):
+        """Release any resources held while a chain is being written.
+
+        This is called by :func:`Sampler.sample` when it finishes. The
+        in-memory backend doesn't hold any resources so this is a no-op.
+
+        """
+        pass
+
     def check_dimensions(self, ensemble):
         """Check that an ensemble is consistent with the current chain.
 
@@ -53,13 +70,14 @@ class Backend(object):
                 inconsistent with the stored data.
 
         """
+        dtype = _storage_dtype(ensemble.dtype, self.float_dtype)
         if self.nwalkers is None:
             self.nwalkers = ensemble.nwalkers
         if self.dtype is None:
-            self.dtype = ensemble.dtype
+            self.dtype = dtype
         if self.nwalkers != ensemble.nwalkers:
             raise ValueError("Dimension mismatch")
-        if self.dtype != ensemble.dtype:
+        if self.dtype != dtype:
             raise ValueError("Data type mismatch")
 
     def extend(self, n):
@@ -70,16 +88,18 @@ class Backend(object):
 
         """
         k = self.nwalkers
-        self.size = l = self.niter + n
+        l = self.niter + n
         if self._data is None:
             self._data = np.empty((l, k), dtype=self.dtype)
             self._acceptance = np.zeros(k, dtype=np.uint64)
-        else:
-            dl = l - self._data.shape[0]
-            if dl > 0:
-                self._data = np.concatenate((
-                    self._data, np.empty((dl, k), dtype=self._data.dtype)
-                ), axis=0)
+        elif l > self._data.shape[0]:
+            # Grow the buffer geometrically so that appending one step at a
+            # time only costs amortized constant time per step.
+            data = np.empty((max(l, 2 * self._data.shape[0]), k),
+                            dtype=self._data.dtype)
+            data[:self.niter] = self._data[:self.niter]
+            self._data = data
+        self.size = self._data.shape[0]
 
     def update(self, ensemble):
         """Append an ensemble to the chain.
@@ -91,10 +111,13 @@ class Backend(object):
         i = self.niter
         if i >= self.size:
             self.extend(i - self.size + 1)
+        # Serialize the walkers directly into the chain to avoid allocating
+        # and copying a temporary record for each walker.
+        row = self._data[i]
         for j, walker in enumerate(ensemble):
-            self._data[i, j] = walker.to_array()
+            walker.to_array(out=row[j:j+1])
         self._acceptance += ensemble.acceptance
-        self._random_state = ensemble.random.get_state()
+        self._random_state = _get_random_state(ensemble.random)
         self.niter += 1
 
     def __getitem__(self, name_and_index_or_slice):
@@ -235,3 +258,25 @@ class Backend(object):
     @property
     def random_state(self):
         return self._random_state
+
+
+def _storage_dtype(dtype, float_dtype):
+    # Convert the floating point fields of a structured dtype.
+    if float_dtype is None:
+        return dtype
+    fields = []
+    for name in dtype.names:
+        field = dtype.fields[name][0]
+        base = field.base
+        if base.kind == "f":
+            base = np.dtype(float_dtype)
+        fields.append((name, base, field.shape))
+    return np.dtype(fields)
+
+
+def _get_random_state(random):
+    # Support both the legacy RandomState and the newer Generator interface.
+    try:
+        return random.get_state()
+    except AttributeError:
+        return random.bit_generator.state
@@ -2,83 +2,230 @@
 
 from __future__ import division, print_function
 
+import os
+import json
 import numpy as np
+from contextlib import contextmanager
 
 try:
     import h5py
 except ImportError:
     h5py = None
 
-from .backend import Backend
+from .backend import Backend, _get_random_state
 
 __all__ = ["HDFBackend"]
 
+# The target size (in bytes) of a single chunk of the chain dataset and the
+# size of the raw data chunk cache used when opening the file.
+CHUNK_NBYTES = 1024 * 1024
+CACHE_NBYTES = 8 * 1024 * 1024
+
 
 class HDFBackend(Backend):
+    """A backend that stores the chain in an HDF5 file using h5py.
+
+    While a chain is being written, the file is held open for writing. The
+    handle is released when :func:`Sampler.sample` finishes so that other
+    processes can open the file between runs. It can also be closed
+    explicitly using :func:`close` or by using the backend as a context
+    manager. Reading from the backend only opens the file read-only and for
+    the duration of the access.
+
+    Args:
+        filename (str): The name of the HDF5 file.
+        name (Optional[str]): The name of the group where the chain will be
+            saved. (default: ``"mcmc"``)
+        niter_total (Optional[int]): If the total number of steps is known in
+            advance, the chain will be stored in a dataset with this fixed
+            size instead of a resizable one. Trying to store more steps than
+            this will raise a ``ValueError``. By default, the dataset is
+            resizable and its size is doubled whenever it fills up.
+        compression (Optional): The compression filter used for the chain
+            dataset (e.g. ``"lzf"``). This is passed directly to ``h5py``.
+            Since each step is flushed to the file, the current chunk is
+            re-compressed for every step so this makes writing the chain
+            much slower. (default: ``None``)
+        compression_opts (Optional): Options for the compression filter.
+            (default: ``None``)
+        shuffle (Optional[bool]): Apply the byte shuffle filter before
+            compressing the chain. (default: ``True``)
+        driver (Optional[str]): The HDF5 file driver. For example, use
+            ``"core"`` to keep the file in memory. (default: ``None``)
+        driver_kwargs (Optional[dict]): Any extra arguments for the file
+            driver (e.g. ``{"backing_store": False}`` for the ``"core"``
+            driver).
 
-    def __init__(self, filename, name="mcmc", **kwargs):
+    """
+
+    def __init__(self, filename, name="mcmc", niter_total=None,
+                 compression=None, compression_opts=None, shuffle=True,
+                 driver=None, driver_kwargs=None, **kwargs):
         if h5py is None:
             raise ImportError("h5py")
         self.filename = filename
         self.name = name
+        self.niter_total = niter_total
+        self.compression = compression
+        self.compression_opts = compression_opts
+        self.shuffle = shuffle
+        self.driver = driver
+        self.driver_kwargs = dict() if driver_kwargs is None else driver_kwargs
+        self._file = None
         super(HDFBackend, self).__init__(**kwargs)
 
     def open(self, mode="r"):
-        return h5py.File(self.filename, mode)
+        return h5py.File(self.filename, mode, libver="latest",
+                         rdcc_nbytes=CACHE_NBYTES, driver=self.driver,
+                         **(self.driver_kwargs))
+
+    def close(self):
+        """Close the file handle held by the backend (if any)."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def __getstate__(self):
+        # The open file handle can't be pickled so it will be re-opened as
+        # needed.
+        d = dict(self.__dict__)
+        d["_file"] = None
+        return d
+
+    def release(self):
+        """Release the file handle if the data would survive closing it.
+
+        Files that only live in memory (the ``"core"`` driver without a
+        backing store) are kept open since closing them discards the chain.
+
+        """
+        if not self._in_memory:
+            self.close()
+
+    @property
+    def _in_memory(self):
+        return (self.driver == "core" and
+                not self.driver_kwargs.get("backing_store", True))
+
+    def _get_group(self):
+        # Get the group for writing. The handle is kept open until released.
+        if self._file is None:
+            self._file = self.open("r+")
+        return self._file[self.name]
+
+    @contextmanager
+    def _read_group(self):
+        # Get the group for reading. If the file isn't already open, it is
+        # only opened read-only while it is being accessed. A ``KeyError`` is
+        # raised if no chain has been saved.
+        if self._file is not None:
+            yield self._file[self.name]
+            return
+        if self._in_memory or (self.driver is None and
+                               not os.path.exists(self.filename)):
+            raise KeyError(self.name)
+        with self.open("r") as f:
+            yield f[self.name]
 
     def reset(self):
         """Clear the chain and reset it to its default state.
 
         """
         self.initialized = False
+        self._buffer = None
         super(HDFBackend, self).reset()
 
     def extend(self, n):
         k = self.nwalkers
         if not self.initialized:
-            with self.open("w") as f:
-                g = f.create_group(self.name)
-                g.attrs["niter"] = 0
-                g.attrs["size"] = n
-                g.create_dataset("chain", (n, k), dtype=self.dtype,
-                                 maxshape=(None, k))
-                g.create_dataset("acceptance",
-                                 data=np.zeros(k, dtype=np.uint64))
+            if self.niter_total is None:
+                l, maxshape = n, (None, k)
+            else:
+                l = max(n, self.niter_total)
+                maxshape = (l, k)
 
+            self.close()
+            self._file = self.open("w")
+            g = self._file.create_group(self.name)
+            g.attrs["niter"] = 0
+            g.attrs["size"] = l
+            # Chunk along the iteration axis so that each step is written to
+            # a single chunk.
+            rows = max(1, CHUNK_NBYTES // (k * self.dtype.itemsize))
+            if maxshape[0] is not None:
+                rows = max(1, min(rows, l))
+            g.create_dataset("chain", (l, k), dtype=self.dtype,
+                             maxshape=maxshape, chunks=(rows, k),
+                             compression=self.compression,
+                             compression_opts=self.compression_opts,
+                             shuffle=self.shuffle and
+                             self.compression is not None)
+            g.create_dataset("acceptance",
+                             data=np.zeros(k, dtype=np.uint64))
             self.initialized = True
 
         else:
-            with self.open("a") as f:
-                g = f[self.name]
+            g = self._get_group()
+            niter = g.attrs["niter"]
+            size = g.attrs["size"]
+            l = niter + n
+            if l <= size:
+                return
 
-                # Update the size entry.
-                niter = g.attrs["niter"]
-                size = g.attrs["size"]
-                l = niter + n
-                g.attrs["size"] = size
-                g["chain"].resize(l, axis=0)
+            chain = g["chain"]
+            if chain.maxshape[0] is not None:
+                raise ValueError("this chain has a fixed size of {0} steps"
+                                 .format(size))
+
+            # Grow the dataset geometrically to keep the number of resize
+            # operations logarithmic in the length of the chain.
+            size = max(l, 2 * size)
+            chain.resize(size, axis=0)
+            g.attrs["size"] = size
 
     def update(self, ensemble):
         # Get the current file shape and dimensions.
-        with self.open() as f:
-            g = f[self.name]
-            niter = g.attrs["niter"]
-            size = g.attrs["size"]
+        g = self._get_group()
+        niter = g.attrs["niter"]
+        size = g.attrs["size"]
 
         # Resize the chain if necessary.
         if niter >= size:
             self.extend(niter - size + 1)
 
+        # Serialize the walkers into a contiguous buffer so that the full
+        # step can be written to the file with a single call.
+        buf = self._buffer
+        if buf is None or len(buf) != ensemble.nwalkers:
+            buf = self._buffer = np.empty(ensemble.nwalkers, dtype=self.dtype)
+        for j, walker in enumerate(ensemble.walkers):
+            walker.to_array(out=buf[j:j+1])
+
         # Update the file.
-        with self.open("a") as f:
-            g = f[self.name]
-            for j, walker in enumerate(ensemble.walkers):
-                g["chain"][niter, j] = walker.to_array()
-            g["acceptance"][:] += ensemble.acceptance
-            state = ensemble.random.get_state()
+        g["chain"][niter] = buf
+        g["acceptance"][:] += ensemble.acceptance
+        state = _get_random_state(ensemble.random)
+        # Remove any state saved by the other kind of generator in case the
+        # chain is continued using a different type of generator.
+        if isinstance(state, dict):
+            # The state of a Generator is stored as JSON.
+            for k in [k for k in g.attrs if k.startswith("random_state_")]:
+                del g.attrs[k]
+            g.attrs["random_state"] = json.dumps(
+                state, default=lambda v: v.tolist())
+        else:
+            if "random_state" in g.attrs:
+                del g.attrs["random_state"]
             for i, v in enumerate(state):
                 g.attrs["random_state_{0}".format(i)] = v
-            g.attrs["niter"] = niter + 1
+        g.attrs["niter"] = niter + 1
+        self._file.flush()
 
     def __getitem__(self, name_and_index_or_slice):
         try:
@@ -88,31 +235,32 @@ class HDFBackend(Backend):
             index_or_slice = slice(None)
 
         try:
-            with self.open() as f:
-                g = f[self.name]
+            with self._read_group() as g:
                 i = g.attrs["niter"]
                 return g["chain"][name][:i][index_or_slice]
-        except IOError:
+        except (IOError, KeyError):
             raise KeyError(name)
 
     @property
     def current_coords(self):
         try:
-            with self.open() as f:
-                g = f[self.name]
+            with self._read_group() as g:
                 i = g.attrs["niter"]
                 if i <= 0:
                     raise IOError()
                 return g["chain"]["coords"][i - 1]
-        except IOError:
+        except (IOError, KeyError):
             raise AttributeError("You need to run the chain first or store "
                                  "the chain using the 'store' keyword "
                                  "argument to Sampler.sample")
 
     @property
     def niter(self):
-        with self.open() as f:
-            return f[self.name].attrs["niter"]
+        try:
+            with self._read_group() as g:
+                return g.attrs["niter"]
+        except KeyError:
+            return 0
 
     # This no-op is here for compatibility with the default Backend.
     @niter.setter
@@ -121,15 +269,18 @@ class HDFBackend(Backend):
 
     @property
     def acceptance(self):
-        with self.open() as f:
-            return f[self.name]["acceptance"][...]
+        with self._read_group() as g:
+            return g["acceptance"][...]
 
     @property
     def random_state(self):
-        with self.open() as f:
+        with self._read_group() as g:
+            attrs = g.attrs
+            if "random_state" in attrs:
+                return json.loads(attrs["random_state"])
             elements = [
                 v
-                for k, v in sorted(f[self.name].attrs.items())
+                for k, v in sorted(attrs.items())
                 if k.startswith("random_state_")
             ]
         return elements if len(elements) else None
@@ -24,9 +24,10 @@ class Ensemble(object):
         pool (Optional): A pool object that exposes a map function for
             parallelization purposes.
         random (Optional): A numpy-compatible random number generator. By
-            default, this will be the built-in ``numpy.random`` module but if
-            you want the ensemble to own its own state, you can supply an
-            instance of ``numpy.random.RandomState``.
+            default, this will be a new ``numpy.random.Generator`` seeded
+            using the global ``numpy.random`` state, but you can also supply
+            your own ``numpy.random.Generator`` or
+            ``numpy.random.RandomState`` instance.
 
     """
     def __init__(self, model, coords, pool=None, random=None):
@@ -40,8 +41,12 @@ class Ensemble(object):
             self.model = SimpleModel(model)
         self.pool = DefaultPool() if pool is None else pool
         if random is None:
-            self.random = np.random.RandomState()
-            self.random.set_state(np.random.get_state())
+            if hasattr(np.random, "default_rng"):
+                self.random = np.random.default_rng(
+                    np.random.randint(0, 2**32, size=4, dtype=np.uint32))
+            else:
+                self.random = np.random.RandomState()
+                self.random.set_state(np.random.get_state())
         else:
             self.random = random
 
@@ -70,6 +75,9 @@ class Ensemble(object):
                 specified coordinates.
 
         """
+        # Skip the pool machinery when running serially.
+        if isinstance(self.pool, DefaultPool):
+            return [self.model(c) for c in coords]
         return list(self.pool.map(self.model, coords))
 
     def update(self, walkers, subset=None):
@@ -92,13 +100,22 @@ class Ensemble(object):
         if subset is None:
             subset = slice(None)
 
-        for j, s in zip(np.arange(self.nwalkers)[subset], walkers):
-            self.acceptance[j] = s.accepted
-            if s.accepted:
-                self.walkers[j] = s
-                if not np.isfinite(s.log_probability):
-                    raise RuntimeError("invalid or zero-probability proposal "
-                                       "accepted")
+        inds = np.arange(self.nwalkers)[subset]
+        accepted = np.fromiter((s.accepted for s in walkers), dtype=bool,
+                               count=len(inds))
+        accepted_inds = np.flatnonzero(accepted)
+
+        # Check all of the accepted states at once before updating anything.
+        log_probability = np.fromiter(
+            (walkers[j].log_probability for j in accepted_inds),
+            dtype=np.float64, count=len(accepted_inds))
+        if not np.isfinite(log_probability).all():
+            raise RuntimeError("invalid or zero-probability proposal "
+                               "accepted")
+
+        self.acceptance[inds] = accepted
+        for j in accepted_inds:
+            self.walkers[inds[j]] = walkers[j]
 
     def __getstate__(self):
         # In order to be generally picklable, we need to discard the pool
@@ -127,11 +144,10 @@ class Ensemble(object):
             return self.walkers[key]
 
     def get_value(self, key, out=None):
+        values = [getattr(s, key) for s in self.walkers]
         if out is None:
-            v = np.asarray(getattr(self.walkers[0], key))
-            out = np.empty((self.nwalkers, ) + v.shape, dtype=v.dtype)
-        for i, s in enumerate(self.walkers):
-            out[i] = getattr(s, key)
+            return np.array(values)
+        out[...] = values
         return out
 
     def __getattr__(self, key):
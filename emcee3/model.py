@@ -152,6 +152,25 @@ class Model(object):
             state.grad_log_likelihood = np.zeros(len(state.coords))
         return state
 
+    def compute_grad_log_probability_batch(self, states, **kwargs):
+        """Compute the gradients of the log probability for a list of states.
+
+        By default, this calls :func:`compute_grad_log_probability` for each
+        state but subclasses can overload this method to compute the
+        gradients for all the states at once. If this method is overloaded,
+        :class:`moves.HamiltonianMove` uses it to integrate all the walkers
+        together when the ensemble isn't using a parallel pool.
+
+        Args:
+            states (list[State]): The current states.
+
+        Returns:
+            list[State]: The updated states.
+
+        """
+        return [self.compute_grad_log_probability(state, **kwargs)
+                for state in states]
+
 
 class SimpleModel(Model):
     """The simplest modeling interface.
@@ -3,7 +3,7 @@
 from __future__ import division, print_function
 
 import numpy as np
-from .red_blue import RedBlueMove
+from .red_blue import RedBlueMove, _random_subsets
 
 __all__ = ["DEMove"]
 
@@ -37,10 +37,7 @@ class DEMove(RedBlueMove):
 
     def get_proposal(self, ens, s, c):
         Ns, Nc = len(s), len(c)
-        q = np.empty((Ns, ens.ndim), dtype=np.float64)
-        f = ens.random.randn(Ns)
-        for i in range(Ns):
-            inds = ens.random.choice(Nc, 2, replace=False)
-            g = np.diff(c[inds], axis=0) * (1 + self.g0 * f[i])
-            q[i] = s[i] + g
-        return q, np.zeros(Ns, dtype=np.float64)
+        f = ens.random.standard_normal(Ns)
+        inds = _random_subsets(ens.random, Nc, Ns, 2)
+        g = (c[inds[:, 1]] - c[inds[:, 0]]) * (1 + self.g0 * f)[:, None]
+        return s + g, np.zeros(Ns, dtype=np.float64)
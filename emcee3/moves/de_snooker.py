@@ -3,7 +3,7 @@
 from __future__ import division, print_function
 
 import numpy as np
-from .red_blue import RedBlueMove
+from .red_blue import RedBlueMove, _random_subsets
 
 __all__ = ["DESnookerMove"]
 
@@ -25,18 +25,34 @@ class DESnookerMove(RedBlueMove):
     """
     def __init__(self, gammas=1.7, **kwargs):
         self.gammas = gammas
+        self._buffers = None
         super(DESnookerMove, self).__init__(**kwargs)
 
+    def get_buffers(self, shape):
+        # The scratch arrays are re-used between proposals with the same
+        # shape. The proposed coordinates are always freshly allocated because
+        # the new walkers keep references to them.
+        if self._buffers is None or self._buffers[0].shape != shape:
+            self._buffers = tuple(np.empty(shape) for _ in range(3))
+        return self._buffers
+
     def get_proposal(self, ens, s, c):
         Ns, Nc = len(s), len(c)
-        q = np.empty((Ns, ens.ndim), dtype=np.float64)
-        metropolis = np.empty(Ns, dtype=np.float64)
-        for i in range(Ns):
-            inds = ens.random.choice(Nc, 3, replace=False)
-            z, z1, z2 = c[inds]
-            delta = s[i] - z
-            norm = np.linalg.norm(delta)
-            u = delta / np.sqrt(norm)
-            q[i] = s[i] + u * self.gammas * (np.dot(u, z1) - np.dot(u, z2))
-            metropolis[i] = np.log(np.linalg.norm(q[i]-z)) - np.log(norm)
+        inds = _random_subsets(ens.random, Nc, Ns, 3)
+        z, delta, u = self.get_buffers(s.shape)
+        np.take(c, inds[:, 0], axis=0, out=z)
+        np.subtract(s, z, out=delta)
+        norm_sq = np.einsum("ij,ij->i", delta, delta)
+        norm = np.sqrt(norm_sq)
+        np.divide(delta, np.sqrt(norm)[:, None], out=u)
+        proj = (np.einsum("ij,ij->i", u, c[inds[:, 1]]) -
+                np.einsum("ij,ij->i", u, c[inds[:, 2]]))
+
+        # Compute the step in place in the (no longer needed) delta buffer.
+        step = np.multiply(u, self.gammas, out=delta)
+        step *= proj[:, None]
+        q = s + step
+        diff = np.subtract(q, z, out=delta)
+        metropolis = 0.5 * (np.log(np.einsum("ij,ij->i", diff, diff)) -
+                            np.log(norm_sq))
         return q, 0.5 * (ens.ndim - 1.0) * metropolis
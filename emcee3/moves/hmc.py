@@ -3,7 +3,10 @@
 from __future__ import division, print_function
 
 import numpy as np
+
 from ..state import State
+from ..model import Model
+from ..pools import DefaultPool
 
 __all__ = ["HamiltonianMove"]
 
@@ -15,41 +18,60 @@ class _hmc_wrapper(object):
         self.model = model
         self.nsteps = nsteps
         self.epsilon = epsilon
-        if len(np.atleast_1d(cov).shape) == 2:
-            self.cov = _hmc_matrix(np.atleast_2d(cov))
-        else:
-            self.cov = _hmc_vector(np.asarray(cov))
+        self.cov = cov
 
     def __call__(self, args):
         current_state, current_p = args
 
-        # Sample the initial momentum.
-        current_q = current_state.coords
-        q = current_q
-        p = current_p
+        # Integrate the dynamics starting from the gradient at the current
+        # state.
+        current_state = self.model.compute_grad_log_probability(current_state)
+        state, p = self.integrate(current_state.coords, current_p,
+                                  current_state.grad_log_probability)
+        return self.finalize(state, current_p, p)
+
+    def compute_grad(self, q):
+        state = self.model.compute_grad_log_probability(State(q))
+        return state, state.grad_log_probability
+
+    def integrate(self, q, p, grad):
+        """Integrate the dynamics using the leapfrog method.
+
+        This works for the coordinates and momenta of either a single walker
+        or a stack of walkers as long as :func:`compute_grad` is consistent.
 
+        Args:
+            q: The initial coordinates.
+            p: The initial momenta.
+            grad: The gradient of the log probability at ``q``.
+
+        Returns:
+            The state(s) at the end of the trajectory (as returned by
+            :func:`compute_grad`) and the final negated momenta.
+
+        """
         # First take a half step in momentum.
-        current_state = self.model.compute_grad_log_probability(current_state)
-        p = p + 0.5 * self.epsilon * current_state.grad_log_probability
+        p = p + 0.5 * self.epsilon * grad
 
-        # Alternate full steps in position and momentum.
-        for i in range(self.nsteps):
-            # First, a full step in position.
+        # Alternate full steps in position and momentum. After the first
+        # step in position, each full step in momentum is combined with the
+        # following step in position.
+        if self.nsteps > 0:
+            q = q + self.epsilon * self.cov.apply(p)
+        for i in range(self.nsteps - 1):
+            _, grad = self.compute_grad(q)
+            p = p + self.epsilon * grad
             q = q + self.epsilon * self.cov.apply(p)
-
-            # Then a full step in momentum.
-            if i < self.nsteps - 1:
-                state = self.model.compute_grad_log_probability(State(q))
-                p = p + self.epsilon * state.grad_log_probability
 
         # Finish with a half momentum step to synchronize with the position.
-        state = self.model.compute_grad_log_probability(State(q))
-        p = p + 0.5 * self.epsilon * state.grad_log_probability
+        state, grad = self.compute_grad(q)
+        p = p + 0.5 * self.epsilon * grad
 
         # Negate the momentum. This step really isn't necessary but it doesn't
         # hurt to keep it here for completeness.
-        p = -p
+        return state, -p
 
+    def finalize(self, state, current_p, p):
         # Compute the log probability of the final state.
         state = self.model.compute_log_probability(state)
 
@@ -64,6 +86,41 @@ class _hmc_wrapper(object):
         return state, factor
 
 
+class _hmc_batch_wrapper(_hmc_wrapper):
+    """Integrate the dynamics of all the walkers simultaneously.
+
+    The model is asked for the gradients of the full set of walkers at each
+    step using :func:`Model.compute_grad_log_probability_batch`.
+
+    """
+
+    def __call__(self, args):
+        current_states, current_p = args
+        q = np.array([s.coords for s in current_states])
+        current_states = self.model.compute_grad_log_probability_batch(
+            current_states)
+        states, p = self.integrate(q, current_p, _get_grad(current_states))
+        return [self.finalize(state, current_p[i], p[i])
+                for i, state in enumerate(states)]
+
+    def compute_grad(self, q):
+        states = self.model.compute_grad_log_probability_batch(
+            [State(x) for x in q])
+        return states, _get_grad(states)
+
+
+def _get_grad(states):
+    return np.array([s.grad_log_probability for s in states])
+
+
+def _has_batch_grad(model):
+    # Only use the batched integrator if the model overloads the default
+    # implementation that loops over the states.
+    method = getattr(type(model), "compute_grad_log_probability_batch", None)
+    return (method is not None and
+            method is not Model.compute_grad_log_probability_batch)
+
+
 class HamiltonianMove(object):
     """A Hamiltonian Monte Carlo move.
 
@@ -91,6 +148,7 @@ class HamiltonianMove(object):
     """
 
     _wrapper = _hmc_wrapper
+    _batch_wrapper = _hmc_batch_wrapper
 
     def __init__(self, nsteps, epsilon, nsplits=2, cov=1.0):
         self.nsteps = nsteps
@@ -110,19 +168,44 @@ class HamiltonianMove(object):
         try:
             L = int(self.nsteps)
         except TypeError:
-            L = rand.randint(self.nsteps[0], self.nsteps[1])
+            L = self.nsteps[0] + rand.choice(self.nsteps[1] - self.nsteps[0])
 
         return eps, L
 
+    def get_cov(self):
+        # Parsing the covariance can require a matrix inverse so the result is
+        # cached until the ``cov`` attribute is replaced.
+        cached = getattr(self, "_cov_cache", None)
+        if cached is None or cached[0] is not self.cov:
+            if len(np.atleast_1d(self.cov).shape) == 2:
+                cov = _hmc_matrix(np.atleast_2d(self.cov))
+            else:
+                cov = _hmc_vector(np.asarray(self.cov))
+            cached = self._cov_cache = (self.cov, cov)
+        return cached[1]
+
     def update(self, ensemble):
+        # When running serially, integrate all the walkers at once if the
+        # model implements batched gradient computations.
+        batch = (
+            self._batch_wrapper is not None and
+            isinstance(ensemble.pool, DefaultPool) and
+            _has_batch_grad(ensemble.model)
+        )
+        wrapper = self._batch_wrapper if batch else self._wrapper
+
         # Set up the integrator and sample the initial momenta.
-        integrator = self._wrapper(ensemble.random, ensemble.model,
-                                   self.cov, *(self.get_args(ensemble)))
+        integrator = wrapper(ensemble.random, ensemble.model, self.get_cov(),
+                             *(self.get_args(ensemble)))
         momenta = integrator.cov.sample(ensemble.random, ensemble.nwalkers,
                                         ensemble.ndim)
 
-        # Integrate the dynamics in parallel.
-        res = ensemble.pool.map(integrator, zip(ensemble.walkers, momenta))
+        # Integrate the dynamics (in parallel if a pool is provided).
+        if batch:
+            res = integrator((ensemble.walkers, momenta))
+        else:
+            res = ensemble.pool.map(integrator,
+                                    zip(ensemble.walkers, momenta))
 
         # Loop over the walkers and update them accordingly.
         states = []
@@ -132,7 +215,7 @@ class HamiltonianMove(object):
                 state.log_probability -
                 ensemble.walkers[i].log_probability
             )
-            if lnpdiff > np.log(ensemble.random.rand()):
+            if lnpdiff > np.log(ensemble.random.random()):
                 state.accepted = True
             states.append(state)
 
@@ -145,9 +228,10 @@ class _hmc_vector(object):
     def __init__(self, cov):
         self.cov = cov
         self.inv_cov = 1.0 / cov
+        self._sqrt_inv_cov = np.sqrt(self.inv_cov)
 
     def sample(self, random, *shape):
-        return random.randn(*shape) * np.sqrt(self.inv_cov)
+        return random.standard_normal(shape) * self._sqrt_inv_cov
 
     def apply(self, x):
         return self.cov * x
@@ -158,11 +242,10 @@ class _hmc_matrix(object):
     def __init__(self, cov):
         self.cov = cov
         self.inv_cov = np.linalg.inv(self.cov)
+        self._chol_inv_cov = np.linalg.cholesky(self.inv_cov)
 
     def sample(self, random, *shape):
-        return random.multivariate_normal(np.zeros(shape[-1]),
-                                          self.inv_cov,
-                                          *(shape[:-1]))
+        return np.dot(random.standard_normal(shape), self._chol_inv_cov.T)
 
     def apply(self, x):
-        return np.dot(self.cov, x)
+        return np.dot(x, self.cov.T)
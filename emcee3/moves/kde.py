@@ -2,13 +2,9 @@
 
 from __future__ import division, print_function
 
+import copy
 import numpy as np
 
-try:
-    from scipy.stats import gaussian_kde
-except ImportError:
-    gaussian_kde = None
-
 from .red_blue import RedBlueMove
 
 __all__ = ["KDEMove"]
@@ -21,20 +17,124 @@ class KDEMove(RedBlueMove):
     use this proposal, you should use *a lot* of walkers in your ensemble.
 
     :param bw_method:
-        The bandwidth estimation method. See `the scipy docs
-        <http://docs.scipy.org/doc/scipy/reference/generated/scipy.stats.gaussian_kde.html>`_
-        for allowed values.
+        The bandwidth estimation method. This can be ``"scott"``,
+        ``"silverman"``, a scalar, or a callable with the same meaning as in
+        `scipy.stats.gaussian_kde
+        <http://docs.scipy.org/doc/scipy/reference/generated/scipy.stats.gaussian_kde.html>`_.
+
+    :param refresh_every: (optional)
+        The number of proposals between re-estimating the kernel covariance.
+        The kernels are always centered on the current complementary
+        ensemble but, if this is larger than ``1``, the bandwidth and
+        covariance estimated from an earlier complementary ensemble will be
+        reused in between. This saves the cost of estimating and factorizing
+        the covariance, but the proposal then depends on past states of the
+        chain, so only do this once the ensemble has converged.
+        (default: ``1``)
 
     """
-    def __init__(self, bw_method=None, **kwargs):
-        if gaussian_kde is None:
-            raise ImportError("you need scipy.stats.gaussian_kde to use the "
-                              "KDEMove")
+    def __init__(self, bw_method=None, refresh_every=1, **kwargs):
         self.bw_method = bw_method
+        self.refresh_every = int(refresh_every)
+        self._kde_cache = None
         super(KDEMove, self).__init__(**kwargs)
 
+    def get_kde(self, c):
+        # Re-use the previous kernel covariance if possible.
+        cache = self._kde_cache
+        if (cache is None or cache[0] >= self.refresh_every or
+                cache[1].d != c.shape[1]):
+            count, kde = 0, _gaussian_kde(c, bw_method=self.bw_method)
+        else:
+            count, kde = cache[0], cache[1].with_dataset(c)
+        self._kde_cache = (count + 1, kde)
+        return kde
+
     def get_proposal(self, ens, s, c):
-        kde = gaussian_kde(c.T, bw_method=self.bw_method)
-        q = kde.resample(len(s))
-        factor = np.log(kde.evaluate(s.T)) - np.log(kde.evaluate(q))
-        return q.T, factor
+        kde = self.get_kde(c)
+        q = kde.resample(ens.random, len(s))
+        factor = kde.logpdf(s) - kde.logpdf(q)
+        return q, factor
+
+
+class _gaussian_kde(object):
+    """A Gaussian KDE that samples and evaluates a batch of points at once.
+
+    The kernel covariance is factorized once so that evaluating the density
+    at a set of points only requires a single matrix product between the
+    whitened points and the whitened dataset.
+
+    Args:
+        dataset (array[n, ndim]): The points defining the density.
+        bw_method (Optional): The bandwidth estimation method. See
+            :class:`KDEMove` for the allowed values.
+
+    """
+
+    def __init__(self, dataset, bw_method=None):
+        self.dataset = np.atleast_2d(dataset)
+        self.n, self.d = self.dataset.shape
+        self.neff = self.n
+
+        if bw_method is None or bw_method == "scott":
+            self.factor = self.scotts_factor()
+        elif bw_method == "silverman":
+            self.factor = self.silverman_factor()
+        elif np.isscalar(bw_method) and not isinstance(bw_method, str):
+            self.factor = float(bw_method)
+        elif callable(bw_method):
+            self.factor = bw_method(self)
+        else:
+            raise ValueError("'bw_method' should be 'scott', 'silverman', a "
+                             "scalar, or a callable")
+
+        self.covariance = self.factor ** 2 * np.atleast_2d(
+            np.cov(self.dataset, rowvar=0))
+        self._chol = np.linalg.cholesky(self.covariance)
+        self._inv_chol = np.linalg.inv(self._chol)
+        self._set_dataset(self.dataset)
+
+    def _set_dataset(self, dataset):
+        # The points are centered before whitening so that the expanded
+        # squared distances in ``logpdf`` don't lose precision when the
+        # dataset is far from the origin relative to its spread.
+        self.dataset = np.atleast_2d(dataset)
+        self.n = self.neff = len(self.dataset)
+        self._mean = np.mean(self.dataset, axis=0)
+        self._whitened = np.dot(self.dataset - self._mean, self._inv_chol.T)
+        self._whitened_norm2 = np.sum(self._whitened ** 2, axis=1)
+        self._log_norm = (
+            np.log(self.n) + 0.5 * self.d * np.log(2 * np.pi) +
+            np.sum(np.log(np.diag(self._chol)))
+        )
+
+    def with_dataset(self, dataset):
+        """Get a KDE for a new dataset using the same kernel covariance."""
+        kde = copy.copy(self)
+        kde._set_dataset(dataset)
+        return kde
+
+    def scotts_factor(self):
+        return self.neff ** (-1.0 / (self.d + 4))
+
+    def silverman_factor(self):
+        return (self.neff * (self.d + 2.0) / 4.0) ** (-1.0 / (self.d + 4))
+
+    def resample(self, random, size):
+        inds = random.choice(self.n, size=size)
+        norm = np.dot(random.standard_normal((size, self.d)), self._chol.T)
+        return self.dataset[inds] + norm
+
+    def logpdf(self, x):
+        w = np.dot(np.atleast_2d(x) - self._mean, self._inv_chol.T)
+        r2 = (
+            np.sum(w ** 2, axis=1)[:, None] + self._whitened_norm2[None, :] -
+            2 * np.dot(w, self._whitened.T)
+        )
+        return _logsumexp(-0.5 * r2, axis=1) - self._log_norm
+
+
+def _logsumexp(a, axis):
+    amax = np.max(a, axis=axis)
+    return amax + np.log(np.sum(np.exp(a - np.expand_dims(amax, axis)),
+                                axis=axis))
@@ -55,7 +55,7 @@ class MHMove(object):
                 ensemble.walkers[i].log_probability +
                 factor[i]
             )
-            if lnpdiff > 0.0 or ensemble.random.rand() < np.exp(lnpdiff):
+            if lnpdiff > 0.0 or ensemble.random.random() < np.exp(lnpdiff):
                 state.accepted = True
 
         # Update the ensemble's coordinates and log-probabilities.
@@ -27,34 +27,56 @@ class _nuts_wrapper(_hmc_wrapper):
         return state
 
     def build_tree(self, state, u, v, j):
-        if j == 0:
-            state_pr = self.leapfrog(state, v * self.epsilon)
-            K_pr = np.dot(state_pr._momentum,
-                          self.cov.apply(state_pr._momentum))
-            log_prob_pr = state_pr.log_probability - 0.5 * K_pr
-            n_pr = int(np.log(u) < log_prob_pr)
-            s_pr = np.log(u) - self.delta_max < log_prob_pr
-            return state_pr, state_pr, state_pr, n_pr, s_pr
-
-        # Recurse.
-        state_m, state_p, state_pr, n_pr, s_pr = \
-            self.build_tree(state, u, v, j - 1)
-        if s_pr:
-            if v < 0.0:
-                state_m, _, state_pr_2, n_pr_2, s_pr_2 = \
-                    self.build_tree(state_m, u, v, j - 1)
-            else:
-                _, state_p, state_pr_2, n_pr_2, s_pr_2 = \
-                    self.build_tree(state_p, u, v, j - 1)
-
-            # Accept.
-            sm = n_pr + n_pr_2
-            if sm > 0 and self.random.rand() < n_pr_2 / sm:
-                state_pr = state_pr_2
-            n_pr += n_pr_2
-
-            s_pr = s_pr & s_pr_2 & self.stop_criterion(state_m, state_p)
-
+        # The balanced binary tree of depth ``j`` is built iteratively: the
+        # ``2**j`` leaves are generated in order along the direction ``v`` and
+        # completed subtrees are merged as soon as their sibling is finished.
+        # Each entry of the stack is a completed subtree waiting for its
+        # sibling and it is stored as ``(depth, (state_m, state_p, state_pr,
+        # n_pr, s_pr))``.
+        log_u = np.log(u)
+        stack = []
+        for _ in range(2 ** j):
+            # Take a leapfrog step from the outermost state.
+            state = self.leapfrog(state, v * self.epsilon)
+            K = np.dot(state._momentum, self.cov.apply(state._momentum))
+            log_prob = state.log_probability - 0.5 * K
+            tree = (state, state, state, int(log_u < log_prob),
+                    log_u - self.delta_max < log_prob)
+
+            # Merge this subtree with any completed siblings.
+            depth = 0
+            while stack and stack[-1][0] == depth:
+                tree = self.merge_trees(stack.pop()[1], tree, v)
+                depth += 1
+
+            # Stop early if this trajectory is done but first, merge the
+            # subtree with the earlier siblings of its ancestors.
+            if not tree[4]:
+                while stack:
+                    tree = self.merge_trees(stack.pop()[1], tree, v)
+                return tree
+
+            stack.append((depth, tree))
+
+        return stack[0][1]
+
+    def merge_trees(self, tree_1, tree_2, v):
+        # Combine two neighboring subtrees where ``tree_2`` extends the
+        # trajectory of ``tree_1`` in the direction ``v``.
+        state_m, state_p, state_pr, n_pr, s_pr = tree_1
+        state_m_2, state_p_2, state_pr_2, n_pr_2, s_pr_2 = tree_2
+        if v < 0.0:
+            state_m = state_m_2
+        else:
+            state_p = state_p_2
+
+        # Accept.
+        sm = n_pr + n_pr_2
+        if sm > 0 and self.random.random() < n_pr_2 / sm:
+            state_pr = state_pr_2
+        n_pr += n_pr_2
+
+        s_pr = s_pr & s_pr_2 & self.stop_criterion(state_m, state_p)
         return state_m, state_p, state_pr, n_pr, s_pr
 
     def stop_criterion(self, state_m, state_p):
@@ -80,7 +102,7 @@ class _nuts_wrapper(_hmc_wrapper):
         f -= 0.5 * np.dot(current_p, self.cov.apply(current_p))
         u = self.random.uniform(0.0, np.exp(f))
         for j in range(self.max_depth):
-            v = 2.0 * (self.random.rand() < 0.5) - 1.0
+            v = 2.0 * (self.random.random() < 0.5) - 1.0
             if v < 0.0:
                 state_minus, _, state_pr, n_pr, s = \
                     self.build_tree(state_minus, u, v, j)
@@ -89,7 +111,7 @@ class _nuts_wrapper(_hmc_wrapper):
                     self.build_tree(state_plus, u, v, j)
 
             # Accept or reject.
-            if s and self.random.rand() < float(n_pr) / n:
+            if s and self.random.random() < float(n_pr) / n:
                 state = state_pr
             n += n_pr
 
@@ -120,6 +142,7 @@ class NoUTurnsMove(HamiltonianMove):
     """
 
     _wrapper = _nuts_wrapper
+    _batch_wrapper = None
 
     def __init__(self, epsilon, nsplits=2, cov=1.0):
         self.epsilon = epsilon
@@ -98,7 +98,7 @@ class RedBlueMove(object):
                     state.log_probability -
                     ensemble.walkers[j].log_probability
                 )
-                if lnpdiff > np.log(ensemble.random.rand()):
+                if lnpdiff > np.log(ensemble.random.random()):
                     state.accepted = True
 
             # Update the ensemble with the accepted walkers.
@@ -108,3 +108,27 @@ class RedBlueMove(object):
         self.finalize(ensemble)
 
         return ensemble
+
+
+def _random_subsets(random, n, size, k):
+    """Draw ``size`` random ordered subsets of ``k`` distinct integers from
+    ``range(n)``.
+
+    All the indices are drawn at once with replacement and then only the rows
+    that contain duplicates are redrawn until none are left.
+
+    """
+    if k > n:
+        raise ValueError("can't draw {0} distinct indices from {1}"
+                         .format(k, n))
+    inds = random.choice(n, size=(size, k))
+    bad = np.arange(size)
+    while len(bad):
+        sub = inds[bad]
+        dup = np.zeros(len(bad), dtype=bool)
+        for i in range(1, k):
+            for j in range(i):
+                dup |= sub[:, i] == sub[:, j]
+        bad = bad[dup]
+        inds[bad] = random.choice(n, size=(len(bad), k))
+    return inds
@@ -25,7 +25,7 @@ class StretchMove(RedBlueMove):
 
     def get_proposal(self, ens, s, c):
         Ns, Nc = len(s), len(c)
-        zz = ((self.a - 1.) * ens.random.rand(Ns) + 1) ** 2. / self.a
+        zz = ((self.a - 1.) * ens.random.random(Ns) + 1) ** 2. / self.a
         factors = (ens.ndim - 1.) * np.log(zz)
-        rint = ens.random.randint(Nc, size=(Ns,))
+        rint = ens.random.choice(Nc, size=Ns)
         return c[rint] - (c[rint] - s) * zz[:, None], factors
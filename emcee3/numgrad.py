@@ -3,61 +3,204 @@
 from __future__ import division, print_function
 import numpy as np
 
+try:
+    from numba import njit
+    from numba.core.dispatcher import Dispatcher
+except ImportError:
+    njit = None
+    Dispatcher = None
+
+try:
+    from joblib import Parallel, delayed
+except ImportError:
+    Parallel = None
+    delayed = None
+
 __all__ = ["numerical_gradient_1", "numerical_gradient_2"]
 
 
 class numerical_gradient_1(object):
-    """Wrap a function to numerically compute first order gradients.
+    """Wrap a function to numerically compute gradients using finite
+    differences.
 
     The function is expected to take a numpy array as its first argument and
     calling an instance of this object will return the gradient with respect
-    to this first argument.
+    to this first argument. This argument is treated as read-only; the
+    perturbed coordinates are always evaluated using a copy.
 
     Args:
         f (callable): The function.
-        eps (Optional[float]): The step size.
+        eps (Optional[float]): The step size. By default, this is
+            ``np.finfo(float).eps ** (1/3)`` for the central scheme and
+            ``1.234e-7`` for the forward scheme.
+        vectorized (Optional[bool]): If ``True``, ``f`` is assumed to accept
+            an array of shape ``(m, ndim)`` and return an array of ``m``
+            values. All of the perturbed coordinates will then be evaluated
+            in a single call. (default: ``False``)
+        scheme (Optional[str]): The finite difference scheme. This can be
+            ``"central"`` (second order accurate, ``2*ndim`` evaluations) or
+            ``"forward"`` (first order accurate, ``ndim+1`` evaluations).
+            (default: ``"central"``)
+        n_jobs (Optional[int]): The number of parallel jobs used to evaluate
+            the perturbed coordinates. Any value other than ``1`` requires
+            `joblib <https://joblib.readthedocs.io>`_ and has the same
+            meaning as in ``joblib.Parallel``. The parallel overhead is
+            typically several milliseconds per call so this is only useful
+            for expensive functions. This is ignored if ``vectorized`` is
+            ``True``. (default: ``1``)
 
     """
 
-    def __init__(self, f, eps=1.234e-7):
+    def __init__(self, f, eps=None, vectorized=False, scheme="central",
+                 n_jobs=1):
+        if scheme not in ("central", "forward"):
+            raise ValueError("'scheme' must be 'central' or 'forward'")
+        if n_jobs != 1 and Parallel is None:
+            raise ImportError("joblib")
+        if eps is None:
+            if scheme == "central":
+                eps = np.finfo(float).eps ** (1.0 / 3)
+            else:
+                eps = 1.234e-7
         self.eps = eps
         self.f = f
+        self.vectorized = vectorized
+        self.scheme = scheme
+        self.n_jobs = n_jobs
+
+    @property
+    def eps(self):
+        return self._eps
+
+    @eps.setter
+    def eps(self, eps):
+        # Cache the reciprocals used to normalize the finite differences.
+        self._eps = eps
+        self._inv_eps = 1.0 / eps
+        self._half_inv_eps = 0.5 / eps
 
     def __call__(self, x, *args, **kwargs):
-        y0 = self.f(x, *args, **kwargs)
-        g = np.zeros(len(x))
+        if self.scheme == "central":
+            return self._central(x, *args, **kwargs)
+        return self._forward(x, *args, **kwargs)
+
+    def _evaluate(self, X, *args, **kwargs):
+        # Evaluate the function at each row of a matrix of coordinates.
+        if self.vectorized:
+            return np.asarray(self.f(X, *args, **kwargs))
+        f = delayed(self.f)
+        return np.array(Parallel(n_jobs=self.n_jobs)(
+            f(x, *args, **kwargs) for x in X))
+
+    def _forward(self, x, *args, **kwargs):
+        if self.vectorized or self.n_jobs != 1:
+            x = np.asarray(x, dtype=float)
+            n = len(x)
+            X = np.tile(x, (n + 1, 1))
+            inds = np.arange(n)
+            X[inds + 1, inds] = x + self.eps
+            y = self._evaluate(X, *args, **kwargs)
+            return (y[1:] - y[0]) * self._inv_eps
+
+        if _is_jitted(self.f) and not (args or kwargs):
+            return _ng1(self.f, np.array(x, dtype=float), self.eps)
+
+        f, eps, inv_eps = self.f, self._eps, self._inv_eps
+        y0 = f(x, *args, **kwargs)
+        xp = np.array(x, dtype=float)
+        g = np.zeros(len(xp))
         for i, v in enumerate(x):
-            x[i] = v + self.eps
-            y = self.f(x, *args, **kwargs)
-            g[i] = (y - y0) / self.eps
-            x[i] = v
+            xp[i] = v + eps
+            y = f(xp, *args, **kwargs)
+            g[i] = (y - y0) * inv_eps
+            xp[i] = v
         return g
 
+    def _central(self, x, *args, **kwargs):
+        if self.vectorized or self.n_jobs != 1:
+            x = np.asarray(x, dtype=float)
+            n = len(x)
+            X = np.tile(x, (2 * n, 1))
+            inds = np.arange(n)
+            X[inds, inds] = x + self.eps
+            X[inds + n, inds] = x - self.eps
+            y = self._evaluate(X, *args, **kwargs)
+            return (y[:n] - y[n:]) * self._half_inv_eps
+
+        if _is_jitted(self.f) and not (args or kwargs):
+            return _ng2(self.f, np.array(x, dtype=float), self.eps)
+
+        f, eps, half_inv_eps = self.f, self._eps, self._half_inv_eps
+        xp = np.array(x, dtype=float)
+        g = np.zeros(len(xp))
+        for i, v in enumerate(x):
+            xp[i] = v + eps
+            yp = f(xp, *args, **kwargs)
+            xp[i] = v - eps
+            ym = f(xp, *args, **kwargs)
+            g[i] = (yp - ym) * half_inv_eps
+            xp[i] = v
+        return g
 
-class numerical_gradient_2(object):
+
+class numerical_gradient_2(numerical_gradient_1):
     """Wrap a function to numerically compute second order gradients.
 
-    The function is expected to take a numpy array as its first argument and
-    calling an instance of this object will return the gradient with respect
-    to this first argument.
+    This is equivalent to :class:`numerical_gradient_1` using the
+    ``"central"`` scheme.
 
     Args:
         f (callable): The function.
         eps (Optional[float]): The step size.
+        vectorized (Optional[bool]): If ``True``, ``f`` is assumed to accept
+            an array of shape ``(m, ndim)`` and return an array of ``m``
+            values. All of the perturbed coordinates will then be evaluated
+            in a single call. (default: ``False``)
+        n_jobs (Optional[int]): The number of parallel jobs. See
+            :class:`numerical_gradient_1` for details. (default: ``1``)
 
     """
 
-    def __init__(self, f, eps=1.234e-7):
-        self.eps = eps
-        self.f = f
-
-    def __call__(self, x, *args, **kwargs):
-        g = np.zeros(len(x))
-        for i, v in enumerate(x):
-            x[i] = v + self.eps
-            yp = self.f(x, *args, **kwargs)
-            x[i] = v - self.eps
-            ym = self.f(x, *args, **kwargs)
-            g[i] = 0.5 * (yp - ym) / self.eps
-            x[i] = v
-        return g
+    def __init__(self, f, eps=1.234e-7, vectorized=False, n_jobs=1):
+        super(numerical_gradient_2, self).__init__(
+            f, eps=eps, vectorized=vectorized, scheme="central",
+            n_jobs=n_jobs)
+
+
+def _is_jitted(f):
+    return Dispatcher is not None and isinstance(f, Dispatcher)
+
+
+def _ng1(f, x, eps):
+    # The first order driver loop for numba compiled functions. ``x`` is
+    # modified in place so it must be a copy of the coordinates.
+    inv_eps = 1.0 / eps
+    y0 = f(x)
+    g = np.zeros(len(x))
+    for i in range(len(x)):
+        xi = x[i]
+        x[i] = xi + eps
+        g[i] = (f(x) - y0) * inv_eps
+        x[i] = xi
+    return g
+
+
+def _ng2(f, x, eps):
+    # The second order version of ``_ng1``.
+    half_inv_eps = 0.5 / eps
+    g = np.zeros(len(x))
+    for i in range(len(x)):
+        xi = x[i]
+        x[i] = xi + eps
+        yp = f(x)
+        x[i] = xi - eps
+        ym = f(x)
+        g[i] = (yp - ym) * half_inv_eps
+        x[i] = xi
+    return g
+
+
+# Compile the driver loops if numba is installed.
+if njit is not None:
+    _ng1 = njit(_ng1)
+    _ng2 = njit(_ng2)
@@ -129,32 +129,36 @@ class Sampler(object):
         else:
             self.backend.reset()
 
-        # Extend the chain to the right length.
-        if store:
-            if niter is None:
-                self.backend.extend(0)
-            else:
-                self.backend.extend(niter // thin)
-
-        # Start the generator.
-        i = 0
-        while True:
-            # Choose a random proposal.
-            p = ensemble.random.choice(self._moves, p=self._weights)
-
-            # Run the update on the current ensemble.
-            ensemble = p.update(ensemble)
-
-            # Store this update if required and if not thinned.
-            if (i + 1) % thin == 0:
-                if store:
-                    self.backend.update(ensemble)
-                yield ensemble
-
-            # Finish the chain if the total number of steps was reached.
-            i += 1
-            if niter is not None and i >= niter:
-                return
+        # The backend is released when the generator finishes or is closed.
+        try:
+            # Extend the chain to the right length.
+            if store:
+                if niter is None:
+                    self.backend.extend(0)
+                else:
+                    self.backend.extend(niter // thin)
+
+            # Start the generator.
+            i = 0
+            while True:
+                # Choose a random proposal.
+                p = ensemble.random.choice(self._moves, p=self._weights)
+
+                # Run the update on the current ensemble.
+                ensemble = p.update(ensemble)
+
+                # Store this update if required and if not thinned.
+                if (i + 1) % thin == 0:
+                    if store:
+                        self.backend.update(ensemble)
+                    yield ensemble
+
+                # Finish the chain if the total number of steps was reached.
+                i += 1
+                if niter is not None and i >= niter:
+                    return
+        finally:
+            self.backend.release()
 
     def get_coords(self, **kwargs):
         return self.backend.get_coords(**kwargs)
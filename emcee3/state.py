@@ -75,12 +75,7 @@ class State(object):
             else:
                 columns.append((k, v.dtype, v.shape))
 
-        return np.dtype([
-            ("coords", np.float64, (len(self.coords),)),
-            ("log_prior", np.float64),
-            ("log_likelihood", np.float64),
-            ("accepted", bool),
-        ] + columns)
+        return _get_dtype(len(self.coords), tuple(columns))
 
     def to_array(self, out=None):
         """Serialize the state to a structured numpy array representation.
@@ -145,3 +140,24 @@ class State(object):
 
         """
         return self.grad_log_prior + self.grad_log_likelihood
+
+
+# Cache of the structured data types keyed by the dimension and the metadata
+# columns since the same few types are constructed over and over.
+_dtype_cache = {}
+
+
+def _get_dtype(ndim, columns):
+    key = (ndim, columns)
+    try:
+        return _dtype_cache[key]
+    except KeyError:
+        pass
+    dtype = np.dtype([
+        ("coords", np.float64, (ndim,)),
+        ("log_prior", np.float64),
+        ("log_likelihood", np.float64),
+        ("accepted", bool),
+    ] + list(columns))
+    _dtype_cache[key] = dtype
+    return dtype
@@ -3,6 +3,7 @@
 from __future__ import division, print_function
 
 import os
+import uuid
 import numpy as np
 from tempfile import NamedTemporaryFile
 
@@ -15,19 +16,29 @@ __all__ = ["NormalWalker", "MetadataWalker", "UniformWalker"]
 class NormalWalker(Model):
 
     def __init__(self, ivar, width=np.inf):
-        self.ivar = ivar
+        self._ivar_scalar = np.ndim(ivar) == 0
+        if self._ivar_scalar:
+            self.ivar = np.float64(ivar)
+        else:
+            self.ivar = np.ascontiguousarray(ivar, dtype=np.float64)
         self.width = width
+        self._inf = np.isinf(width)
 
     def compute_log_prior(self, state):
-        p = state.coords
         state.log_prior = 0.0
-        if np.any(np.abs(p) > self.width):
+        if self._inf:
+            return state
+        if np.max(np.abs(state.coords)) > self.width:
             state.log_prior = -np.inf
         return state
 
     def compute_log_likelihood(self, state):
         p = state.coords
-        state.log_likelihood = -0.5 * np.sum(p ** 2 * self.ivar)
+        if self._ivar_scalar:
+            state.log_likelihood = -0.5 * self.ivar * np.dot(p, p)
+        else:
+            state.log_likelihood = -0.5 * np.einsum("i,i,i->", p, p,
+                                                    self.ivar)
         return state
 
     def compute_grad_log_prior(self, state):
@@ -54,21 +65,47 @@ class UniformWalker(SimpleModel):
     def __init__(self):
         super(UniformWalker, self).__init__(
             lambda p, *args: 0.0,
-            lambda p, *args: 0.0 if np.all((-1 < p) * (p < 1)) else -np.inf,
+            _uniform_log_prior,
             args=("nothing", "something")
         )
 
 
+def _uniform_log_prior(p, *args):
+    # For only a few dimensions, a plain loop beats the numpy call overhead.
+    if len(p) <= 4:
+        for v in p:
+            if not -1 < v < 1:
+                return -np.inf
+        return 0.0
+    return 0.0 if np.max(np.abs(p)) < 1 else -np.inf
+
+
 class TempHDFBackend(object):
+    """A temporary HDF5 backend for testing.
+
+    By default, the file is only kept in memory. Set ``in_memory=False`` if
+    the file needs to be re-opened by another backend.
+
+    """
 
-    def __init__(self, **kwargs):
+    def __init__(self, in_memory=True, **kwargs):
+        self.in_memory = in_memory
         self.kwargs = kwargs
 
     def __enter__(self):
-        f = NamedTemporaryFile("w", delete=False)
-        f.close()
-        self.filename = f.name
-        return backends.HDFBackend(f.name, "test", **(self.kwargs))
+        if self.in_memory:
+            self.filename = "emcee3-{0}.h5".format(uuid.uuid4().hex)
+            self.kwargs = dict(self.kwargs, driver="core",
+                               driver_kwargs=dict(backing_store=False))
+        else:
+            f = NamedTemporaryFile("w", delete=False)
+            f.close()
+            self.filename = f.name
+        self.backend = backends.HDFBackend(self.filename, "test",
+                                           **(self.kwargs))
+        return self.backend
 
     def __exit__(self, exception_type, exception_value, traceback):
-        os.remove(self.filename)
+        self.backend.close()
+        if not self.in_memory:
+            os.remove(self.filename)
@@ -2,10 +2,47 @@
 
 from __future__ import division, print_function
 
-from ... import moves
+import numpy as np
+
+from ... import moves, Ensemble
+from ..common import NormalWalker
 from .test_proposal import _test_normal
 
-__all__ = ["test_normal_hmc", "test_normal_hmc_nd"]
+__all__ = ["test_normal_hmc", "test_normal_hmc_nd", "test_hmc_pool",
+           "test_hmc_batch_model", "test_hmc_integer_cov"]
+
+
+class MapPool(object):
+
+    def map(self, fn, iterable):
+        return list(map(fn, iterable))
+
+
+class BatchNormalWalker(NormalWalker):
+
+    def __init__(self, *args, **kwargs):
+        self.nbatch = 0
+        super(BatchNormalWalker, self).__init__(*args, **kwargs)
+
+    def compute_grad_log_probability_batch(self, states):
+        self.nbatch += 1
+        q = np.array([s.coords for s in states])
+        grad = -q * self.ivar
+        for s, g in zip(states, grad):
+            s.grad_log_prior = np.zeros_like(g)
+            s.grad_log_likelihood = g
+        return states
+
+
+def _run_hmc(model, pool, cov=1.0, nwalkers=32, ndim=3, nsteps=20,
+             seed=1234):
+    rnd = np.random.RandomState(seed)
+    coords = rnd.randn(nwalkers, ndim)
+    ensemble = Ensemble(model, coords, pool=pool, random=rnd)
+    move = moves.HamiltonianMove((5, 10), (0.05, 0.1), cov=cov)
+    for i in range(nsteps):
+        move.update(ensemble)
+    return ensemble.coords
 
 
 def test_normal_hmc(**kwargs):
@@ -21,3 +58,33 @@ def test_uniform_hmc(**kwargs):
 def test_normal_hmc_nd(**kwargs):
     _test_normal(moves.HamiltonianMove(10, 0.1), ndim=3, nsteps=100,
                  check_acceptance=False)
+
+
+def test_hmc_pool():
+    # The serial and the pooled code paths should be identical.
+    for cov in [1.0, np.array([1.0, 2.0, 0.5])]:
+        a = _run_hmc(NormalWalker(1.0), None, cov=cov)
+        b = _run_hmc(NormalWalker(1.0), MapPool(), cov=cov)
+        np.testing.assert_array_equal(a, b)
+
+
+def test_hmc_batch_model():
+    # Models that implement the batch gradients are integrated all at once
+    # when running serially and the results match the per-walker integrator.
+    model = BatchNormalWalker(1.0)
+    a = _run_hmc(model, None)
+    assert model.nbatch > 0
+
+    model = BatchNormalWalker(1.0)
+    b = _run_hmc(model, MapPool())
+    assert model.nbatch == 0
+    np.testing.assert_allclose(a, b)
+
+
+def test_hmc_integer_cov():
+    # Integer mass matrices should behave like their floating point versions.
+    for cov, fcov in [(1, 1.0), ([1, 2, 1], [1.0, 2.0, 1.0]),
+                      (np.eye(3, dtype=int), np.eye(3))]:
+        a = _run_hmc(NormalWalker(1.0), None, cov=cov, nsteps=5)
+        b = _run_hmc(NormalWalker(1.0), None, cov=fcov, nsteps=5)
+        np.testing.assert_allclose(a, b)
@@ -2,10 +2,15 @@
 
 from __future__ import division, print_function
 
+import numpy as np
+from scipy import stats
+
 from ... import moves
+from ...moves.kde import _gaussian_kde
 from .test_proposal import _test_normal, _test_uniform
 
-__all__ = ["test_normal_kde", "test_uniform_kde", "test_nsplits_kde"]
+__all__ = ["test_normal_kde", "test_uniform_kde", "test_nsplits_kde",
+           "test_refresh_kde", "test_kde_logpdf"]
 
 
 def test_normal_kde(**kwargs):
@@ -18,3 +23,19 @@ def test_uniform_kde(**kwargs):
 
 def test_nsplits_kde(**kwargs):
     _test_normal(moves.KDEMove(nsplits=5), **kwargs)
+
+
+def test_refresh_kde(**kwargs):
+    _test_normal(moves.KDEMove(refresh_every=10), **kwargs)
+
+
+def test_kde_logpdf(seed=1234, nwalkers=64, ndim=3):
+    # Compare the density to scipy, including for ensembles that are far
+    # from the origin relative to their spread.
+    rnd = np.random.RandomState(seed)
+    for offset, sigma in [(0.0, 1.0), (1e3, 1e-2), (1e4, 1e-3), (1e6, 1e-2)]:
+        c = offset + sigma * rnd.randn(nwalkers, ndim)
+        x = offset + sigma * rnd.randn(10, ndim)
+        kde = _gaussian_kde(c)
+        expect = stats.gaussian_kde(c.T).logpdf(x.T)
+        assert np.allclose(kde.logpdf(x), expect, rtol=0, atol=1e-6)
@@ -21,14 +21,25 @@ def _test_normal(proposal, ndim=1, nwalkers=32, nsteps=2000, seed=1234,
     coords = rnd.randn(nwalkers, ndim)
     ensemble = Ensemble(NormalWalker(1.), coords, random=rnd)
 
-    # Run the chain.
-    chain = np.empty((nsteps, nwalkers, ndim))
+    # Run the chain and accumulate the moments of the samples as we go. The
+    # full chain is only needed for the K-S test in one dimension.
+    samps = np.empty((nsteps, nwalkers)) if ndim == 1 else None
+    n, mu, m2 = 0, 0.0, 0.0
     acc = np.zeros(nwalkers, dtype=int)
-    for i in range(len(chain)):
+    for i in range(nsteps):
         proposal.update(ensemble)
-        chain[i] = ensemble.coords
+        x = ensemble.coords.flatten()
+        if samps is not None:
+            samps[i] = x
         acc += ensemble.acceptance
 
+        # Merge the moments of this step (Chan et al. 1979).
+        mu_x = np.mean(x)
+        delta = mu_x - mu
+        n, n_prev = n + len(x), n
+        mu += delta * len(x) / n
+        m2 += np.sum((x - mu_x) ** 2) + delta ** 2 * n_prev * len(x) / n
+
     # Check the acceptance fraction.
     if check_acceptance:
         acc = acc / nsteps
@@ -37,13 +48,12 @@ def _test_normal(proposal, ndim=1, nwalkers=32, nsteps=2000, seed=1234,
 
     # Check the resulting chain using a K-S test and compare to the mean and
     # standard deviation.
-    samps = chain.flatten()
-    mu, sig = np.mean(samps, axis=0), np.std(samps, axis=0)
+    sig = np.sqrt(m2 / n)
     assert np.all(np.abs(mu) < 0.05), "Incorrect mean"
     assert np.all(np.abs(sig - 1) < 0.05), "Incorrect standard deviation"
 
     if ndim == 1:
-        ks, _ = stats.kstest(samps, "norm")
+        ks, _ = stats.kstest(samps.flatten(), "norm")
         assert ks < 0.05, "The K-S test failed"
 
 
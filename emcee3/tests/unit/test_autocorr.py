@@ -6,21 +6,44 @@ import pytest
 import numpy as np
 from ...autocorr import integrated_time, AutocorrError
 
+try:
+    from scipy.signal import lfilter
+except ImportError:
+    lfilter = None
+
 __all__ = ["test_nd", "test_too_short"]
 
 
-def get_chain(seed=1234, ndim=3, N=100000):
+# The chains are deterministic so they are cached and shared between tests.
+# All the tests use (slices of) the same chain.
+_chain_cache = {}
+
+
+def get_chain(seed=1234, ndim=3, N=150000):
+    key = (seed, ndim, N)
+    if key not in _chain_cache:
+        x = _generate_chain(seed, ndim, N)
+        x.setflags(write=False)
+        _chain_cache[key] = x
+    return _chain_cache[key]
+
+
+def _generate_chain(seed, ndim, N):
     np.random.seed(seed)
     a = 0.9
-    x = np.empty((N, ndim))
-    x[0] = np.zeros(ndim)
+    noise = np.zeros((N, ndim))
+    noise[1:] = np.random.rand(N - 1, ndim)
+    if lfilter is not None:
+        # Run the AR(1) recursion in compiled code.
+        return lfilter([1.0], [1.0, -a], noise, axis=0)
+    x = noise
     for i in range(1, N):
-        x[i] = x[i-1] * a + np.random.rand(ndim)
+        x[i] += x[i-1] * a
     return x
 
 
 def test_1d(seed=1234, ndim=1, N=150000, c=6):
-    x = get_chain(seed=seed, ndim=ndim, N=N)
+    x = get_chain(seed=seed, N=N)[:, :ndim]
     tau, M = integrated_time(x, c=c, full_output=True)
     assert np.all(M > c * tau)
     assert np.all(np.abs(tau - 19.0) / 19. < 0.2)
@@ -33,7 +56,8 @@ def test_nd(seed=1234, ndim=3, N=150000):
 
 
 def test_too_short(seed=1234, ndim=3, N=500):
-    x = get_chain(seed=seed, ndim=ndim, N=N)
+    # The beginning of the long chain is identical to a short chain.
+    x = get_chain(seed=seed, ndim=ndim)[:N]
     with pytest.raises(AutocorrError):
         integrated_time(x)
     with pytest.raises(AutocorrError):
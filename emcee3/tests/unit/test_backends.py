@@ -2,11 +2,19 @@
 
 from __future__ import division, print_function
 
+import os
+import sys
+import pytest
+import subprocess
 import numpy as np
+from collections import deque
 from ... import backends, Sampler, Ensemble
 from ..common import NormalWalker, TempHDFBackend, MetadataWalker
 
-__all__ = ["test_metadata", "test_hdf", "test_hdf_reload"]
+__all__ = ["test_metadata", "test_hdf", "test_hdf_reload",
+           "test_hdf_niter_total", "test_float_dtype",
+           "test_hdf_generator_state", "test_hdf_compression",
+           "test_hdf_other_process"]
 
 
 def run_sampler(backend, model=NormalWalker(1.0), nwalkers=32, ndim=3,
@@ -16,7 +24,7 @@ def run_sampler(backend, model=NormalWalker(1.0), nwalkers=32, ndim=3,
     coords = rnd.randn(nwalkers, ndim)
     ensemble = Ensemble(model, coords, random=rnd)
     sampler = Sampler(backend=backend)
-    list(sampler.sample(ensemble, nsteps))
+    deque(sampler.sample(ensemble, nsteps), maxlen=0)
     return sampler
 
 
@@ -54,11 +62,12 @@ def test_hdf():
                   "acceptance_fraction"]:
             a = getattr(sampler1, k)
             b = getattr(sampler2, k)
-            assert np.allclose(a, b), "inconsistent {0}".format(k)
+            np.testing.assert_allclose(a, b, rtol=1e-12,
+                                       err_msg="inconsistent {0}".format(k))
 
 
 def test_hdf_reload():
-    with TempHDFBackend() as backend1:
+    with TempHDFBackend(in_memory=False) as backend1:
         run_sampler(backend1)
 
         # Test the state
@@ -69,12 +78,98 @@ def test_hdf_reload():
         backend2 = backends.HDFBackend(backend1.filename, backend1.name)
 
         assert state[0] == backend2.random_state[0]
-        assert all(np.allclose(a, b)
-                   for a, b in zip(state[1:], backend2.random_state[1:]))
+        for a, b in zip(state[1:], backend2.random_state[1:]):
+            np.testing.assert_array_equal(a, b)
 
         # Check all of the components.
         for k in ["coords", "log_prior", "log_likelihood", "log_probability",
                   "acceptance", "acceptance_fraction"]:
             a = getattr(backend1, k)
             b = getattr(backend2, k)
-            assert np.allclose(a, b), "inconsistent {0}".format(k)
+            np.testing.assert_array_equal(
+                a, b, err_msg="inconsistent {0}".format(k))
+
+
+def test_hdf_niter_total():
+    sampler1 = run_sampler(backends.Backend())
+
+    with TempHDFBackend(niter_total=5) as backend:
+        sampler2 = run_sampler(backend)
+        assert np.allclose(sampler1.coords, sampler2.coords)
+
+        # The fixed size dataset can't be extended.
+        with pytest.raises(ValueError):
+            backend.extend(1)
+
+
+def test_hdf_compression():
+    sampler1 = run_sampler(backends.Backend())
+
+    for kwargs in [dict(), dict(compression="lzf"),
+                   dict(compression="gzip", compression_opts=4)]:
+        with TempHDFBackend(**kwargs) as backend:
+            sampler2 = run_sampler(backend)
+            chain = backend._get_group()["chain"]
+            assert chain.compression == kwargs.get("compression")
+            assert np.allclose(sampler1.coords, sampler2.coords)
+
+
+def test_float_dtype():
+    sampler1 = run_sampler(backends.Backend())
+    sampler2 = run_sampler(backends.Backend(float_dtype=np.float32))
+    assert sampler2.coords.dtype == np.float32
+    assert sampler2.log_probability.dtype == np.float32
+    assert np.allclose(sampler1.coords, sampler2.coords, rtol=1e-6)
+
+    with TempHDFBackend(float_dtype=np.float32) as backend:
+        sampler3 = run_sampler(backend)
+        assert sampler3.coords.dtype == np.float32
+        assert np.allclose(sampler2.coords, sampler3.coords)
+
+
+def test_hdf_generator_state(nwalkers=32, ndim=3, nsteps=5, seed=1234):
+    rng = np.random.default_rng(seed)
+    coords = rng.standard_normal((nwalkers, ndim))
+    ensemble = Ensemble(NormalWalker(1.0), coords, random=rng)
+    with TempHDFBackend(in_memory=False) as backend1:
+        Sampler(backend=backend1).run(ensemble, nsteps)
+        state = rng.bit_generator.state
+        assert backend1.random_state == state
+
+        backend2 = backends.HDFBackend(backend1.filename, backend1.name)
+        assert backend2.random_state == state
+
+        # Continue the chain using the other kind of generator and back.
+        ensemble.random = np.random.RandomState(seed)
+        Sampler(backend=backend1).run(ensemble, nsteps)
+        state = ensemble.random.get_state()
+        assert backend1.random_state[0] == state[0]
+        np.testing.assert_array_equal(backend1.random_state[1], state[1])
+
+        ensemble.random = rng
+        Sampler(backend=backend1).run(ensemble, nsteps)
+        assert backend1.random_state == rng.bit_generator.state
+
+
+def test_hdf_other_process():
+    # Another process should be able to read the file once the sampler is
+    # done even though the backend that wrote it is still alive.
+    root = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.dirname(os.path.abspath(__file__)))))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [root] + [p for p in [env.get("PYTHONPATH")] if p])
+    code = ("from emcee3.backends import HDFBackend; "
+            "b = HDFBackend({0!r}, {1!r}); print(b.niter, b.coords.shape)")
+
+    with TempHDFBackend(in_memory=False) as backend:
+        run_sampler(backend)
+        out = subprocess.check_output(
+            [sys.executable, "-c", code.format(backend.filename,
+                                               backend.name)], env=env)
+        assert out.decode().split()[0] == str(backend.niter)
+        assert "(5, 32, 3)" in out.decode()
+
+        # The file can be written to again afterwards.
+        run_sampler(backend)
+        assert backend.niter == 10
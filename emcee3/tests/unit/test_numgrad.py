@@ -5,10 +5,24 @@ from __future__ import division, print_function
 import pytest
 import numpy as np
 from itertools import product
+from threading import Thread
+from time import sleep
 from ...numgrad import numerical_gradient_1, numerical_gradient_2
 
+try:
+    import numba
+except ImportError:
+    numba = None
 
-__all__ = ["test_numgrad"]
+try:
+    import joblib
+except ImportError:
+    joblib = None
+
+
+__all__ = ["test_numgrad", "test_numgrad_vectorized",
+           "test_numgrad_numba", "test_numgrad_scheme",
+           "test_numgrad_parallel", "test_numgrad_threads"]
 
 
 def f1(x):
@@ -23,6 +37,14 @@ def f2(x):
     return np.sum(x)
 
 
+def f1_vec(x):
+    return -0.5 * np.sum(x**2, axis=-1)
+
+
+def f2_vec(x):
+    return np.sum(x, axis=-1)
+
+
 def dfdx2(x):
     return np.ones(len(x))
 
@@ -45,4 +67,92 @@ def test_numgrad(funcs, gf, seed=42):
     assert np.allclose(dfdx(x), numgrad(x), atol=2*numgrad.eps)
 
     x = np.random.randn(7)
+    x0 = np.array(x)
     assert np.allclose(dfdx(x), numgrad(x), atol=2*numgrad.eps)
+    assert np.all(x == x0)
+
+
+@pytest.mark.parametrize("funcs,gf", product(
+    [(f1, f1_vec), (f2, f2_vec)],
+    [numerical_gradient_1, numerical_gradient_2],
+))
+def test_numgrad_vectorized(funcs, gf, seed=42):
+    f, f_vec = funcs
+
+    np.random.seed(seed)
+    numgrad = gf(f)
+    numgrad_vec = gf(f_vec, vectorized=True)
+
+    for x in [np.zeros(5), np.ones(2), np.random.randn(7)]:
+        assert np.allclose(numgrad(x), numgrad_vec(x))
+
+
+@pytest.mark.skipif(numba is None, reason="numba is not installed")
+@pytest.mark.parametrize("funcs,gf", product(
+    [(f1, dfdx1), (f2, dfdx2)],
+    [numerical_gradient_1, numerical_gradient_2],
+))
+def test_numgrad_numba(funcs, gf, seed=42):
+    f, dfdx = funcs
+
+    np.random.seed(seed)
+    numgrad = gf(f)
+    numgrad_jit = gf(numba.njit(f))
+
+    x = np.random.randn(7)
+    x0 = np.array(x)
+    assert np.allclose(numgrad(x), numgrad_jit(x))
+    assert np.all(x == x0)
+
+
+def test_numgrad_scheme(seed=42):
+    np.random.seed(seed)
+    x = np.random.randn(7)
+    dfdx = np.cos(x)
+
+    def f(x):
+        return np.sum(np.sin(x))
+
+    central = numerical_gradient_1(f)
+    forward = numerical_gradient_1(f, scheme="forward")
+    assert central.eps > forward.eps
+    assert np.allclose(dfdx, central(x), atol=1e-9)
+    assert np.allclose(dfdx, forward(x), atol=1e-6)
+    assert (np.max(np.abs(dfdx - central(x))) <
+            np.max(np.abs(dfdx - forward(x))))
+
+    with pytest.raises(ValueError):
+        numerical_gradient_1(f, scheme="backward")
+
+
+@pytest.mark.skipif(joblib is None, reason="joblib is not installed")
+@pytest.mark.parametrize("gf", [numerical_gradient_1, numerical_gradient_2])
+def test_numgrad_parallel(gf, seed=42):
+    np.random.seed(seed)
+    x = np.random.randn(7)
+    assert np.allclose(gf(f1)(x), gf(f1, n_jobs=2)(x))
+
+
+@pytest.mark.parametrize("gf", [numerical_gradient_1, numerical_gradient_2])
+def test_numgrad_threads(gf, seed=42, nthreads=4, ncalls=50):
+    # A single wrapper should be safe to share between threads.
+    def f(x):
+        # Give the other threads a chance to run during the evaluation.
+        sleep(1e-4)
+        return f1_vec(x)
+
+    np.random.seed(seed)
+    numgrad = gf(f, vectorized=True)
+    xs = np.random.randn(nthreads, ncalls, 7)
+    results = np.empty_like(xs)
+
+    def run(k):
+        for i, x in enumerate(xs[k]):
+            results[k, i] = numgrad(x)
+
+    threads = [Thread(target=run, args=(k, )) for k in range(nthreads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert np.allclose(results, dfdx1(xs), atol=2*numgrad.eps)
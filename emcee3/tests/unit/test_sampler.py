@@ -4,6 +4,7 @@ from __future__ import division, print_function
 
 import pytest
 import numpy as np
+from collections import deque
 from ... import moves, backends, Sampler, Ensemble
 from ..common import NormalWalker, TempHDFBackend
 
@@ -151,7 +152,7 @@ def run_sampler(nwalkers=32, ndim=3, nsteps=25, seed=1234, thin=1):
     coords = rnd.randn(nwalkers, ndim)
     ensemble = Ensemble(NormalWalker(1.0), coords, random=rnd)
     sampler = Sampler()
-    list(sampler.sample(ensemble, nsteps, thin=thin))
+    deque(sampler.sample(ensemble, nsteps, thin=thin), maxlen=0)
     return sampler
 
 